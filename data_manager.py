@@ -2,28 +2,24 @@ from typing import Any, Dict
 
 from loguru import logger
 
-from db import PrimaryData, FinallyData
+from models import PrimaryData, FinallyData
 
 class DataManager():
-    async def process_nodes(nodes: list[dict]) -> list[PrimaryData]:
+    @staticmethod
+    def process_nodes(nodes: list[dict]) -> list[PrimaryData]:
         '''Обрабатывает выводы из хактивити.'''
-        data = []
-        for node in nodes:
-            if node['reporter']:
-                username = node['reporter']['username']
-                source = node['__typename']
-                jsondata = node
-                obj = PrimaryData(None, username, source, jsondata)
-                data.append(obj)
-        return data
+        return [
+            PrimaryData(None, node['reporter']['username'], node['__typename'], node)
+            for node in nodes if node['reporter']
+        ]
     
-    async def process_edges(edges: list[dict]) -> list[PrimaryData]:
+    @staticmethod
+    def process_edges(edges: list[dict]) -> list[PrimaryData]:
         '''Обрабатывает выводы из лидерборда.'''
-        data = []
-        for edge in edges:
-            obj = PrimaryData(None, edge['node']['user']['username'], edge['__typename'], edge)
-            data.append(obj)
-        return data
+        return [
+            PrimaryData(None, edge['node']['user']['username'], edge['__typename'], edge)
+            for edge in edges
+        ]
     
     async def process_profile(user_data: Dict[str, Any]) -> 'FinallyData':
         '''Обрабатывает общую информацию профиля.'''
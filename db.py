@@ -1,154 +1,156 @@
 import asyncio
-import json
-from datetime import datetime
-from typing import List, Optional, Dict, Any
-from dataclasses import dataclass, asdict, field
+from typing import Any, AsyncIterator, Dict, Final, List, Optional, Sequence, Tuple
 
 import aiosqlite
 from loguru import logger
 
-@dataclass
-class PrimaryData:
-    """Датакласс для primary_table"""
-    id: Optional[int] = None
-    username: str = ""
-    source: str = ""
-    json_info: Dict[str, Any] = field(default_factory=dict)
-    created_at: Optional[str] = None
-    
-    @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> 'PrimaryData':
-        """Создание объекта из словаря"""
-        return cls(
-            id=data.get('id'),
-            username=data.get('username', ''),
-            source=data.get('source', ''),
-            json_info=data.get('json_info', {}),
-            created_at=data.get('created_at')
-        )
-    
-    def to_dict(self) -> Dict[str, Any]:
-        """Преобразование в словарь"""
-        return asdict(self)
+from models import PrimaryData, FinallyData, FINALLY_COLUMNS, json_dumps, parse_timestamp
 
-@dataclass
-class FinallyData:
-    """Датакласс для finally_table"""
-    id: Optional[int] = None
-    username: str = ""
-    name: Optional[str] = None
-    intro: Optional[str] = None
-    profileActivated: bool = False
-    profile_created_at: Optional[str] = None
-    location: Optional[str] = None
-    website: Optional[str] = None
-    bio: Optional[str] = None
-    bugcrowd_handle: Optional[str] = None
-    hack_the_box_handle: Optional[str] = None
-    github_handle: Optional[str] = None
-    gitlab_handle: Optional[str] = None
-    linkedin_handle: Optional[str] = None
-    twitter_handle: Optional[str] = None
-    cleared: bool = False
-    verified: bool = False
-    open_for_employment: Optional[bool] = None
-    mark_as_company_on_leaderboards: bool = False
-    resolved_report_count: int = 0
-    thanks_items_total_count: int = 0
-    badges_json: List[Dict[str, Any]] = field(default_factory=list)
-    public_reviews_json: List[Dict[str, Any]] = field(default_factory=list)
-    created_at: Optional[str] = None
-    
-    @classmethod
-    def from_user_data(cls, user_data: Dict[str, Any]) -> 'FinallyData':
-        """Создание объекта из сырых данных пользователя"""
+_CREATE_FINALLY_USERNAME_INDEX_SQL: Final[str] = (
+    'CREATE UNIQUE INDEX IF NOT EXISTS idx_finally_username ON finally_table(username)'
+)
 
-        badges = user_data.get('badges', {})
-        if isinstance(badges, dict):
-            badges_json = badges.get('edges', [])
-        else:
-            badges_json = []
+_INSERT_PRIMARY_SQL: Final[str] = 'INSERT INTO primary_table (username, source, json_info) VALUES (?, ?, ?)'
 
-        public_reviews = user_data.get('public_reviews', {})
-        if isinstance(public_reviews, dict):
-            public_reviews_json = public_reviews.get('edges', [])
-        else:
-            public_reviews_json = []
-        
-        return cls(
-            username=user_data.get('username', ''),
-            name=user_data.get('name'),
-            intro=user_data.get('intro'),
-            profileActivated=user_data.get('profileActivated', False),
-            profile_created_at=user_data.get('created_at'),
-            location=user_data.get('location'),
-            website=user_data.get('website'),
-            bio=user_data.get('bio'),
-            bugcrowd_handle=user_data.get('bugcrowd_handle'),
-            hack_the_box_handle=user_data.get('hack_the_box_handle'),
-            github_handle=user_data.get('github_handle'),
-            gitlab_handle=user_data.get('gitlab_handle'),
-            linkedin_handle=user_data.get('linkedin_handle'),
-            twitter_handle=user_data.get('twitter_handle'),
-            cleared=user_data.get('cleared', False),
-            verified=user_data.get('verified', False),
-            open_for_employment=user_data.get('open_for_employment'),
-            mark_as_company_on_leaderboards=user_data.get('mark_as_company_on_leaderboards', False),
-            resolved_report_count=user_data.get('resolved_report_count', 0),
-            thanks_items_total_count=user_data.get('thanks_items_total_count', 0),
-            badges_json=badges_json,
-            public_reviews_json=public_reviews_json
-        )
-    
-    def to_db_dict(self) -> Dict[str, Any]:
-        """Преобразование в словарь для вставки в БД"""
-        badges_json_str = json.dumps(self.badges_json, ensure_ascii=False)
-        reviews_json_str = json.dumps(self.public_reviews_json, ensure_ascii=False)
-        
-        return {
-            'username': self.username,
-            'name': self.name,
-            'intro': self.intro,
-            'profileActivated': self.profileActivated,
-            'profile_created_at': self.profile_created_at,
-            'location': self.location,
-            'website': self.website,
-            'bio': self.bio,
-            'bugcrowd_handle': self.bugcrowd_handle,
-            'hack_the_box_handle': self.hack_the_box_handle,
-            'github_handle': self.github_handle,
-            'gitlab_handle': self.gitlab_handle,
-            'linkedin_handle': self.linkedin_handle,
-            'twitter_handle': self.twitter_handle,
-            'cleared': self.cleared,
-            'verified': self.verified,
-            'open_for_employment': self.open_for_employment,
-            'mark_as_company_on_leaderboards': self.mark_as_company_on_leaderboards,
-            'resolved_report_count': self.resolved_report_count,
-            'thanks_items_total_count': self.thanks_items_total_count,
-            'badges_json': badges_json_str,  # JSON строка
-            'public_reviews_json': reviews_json_str  # JSON строка
-        }
-    
-    def to_dict(self) -> Dict[str, Any]:
-        """Преобразование в обычный словарь"""
-        return asdict(self)
+_INSERT_FINALLY_SQL: Final[str] = '''
+    INSERT INTO finally_table (
+        username, name, intro, profileActivated, profile_created_at,
+        location, website, bio, bugcrowd_handle, hack_the_box_handle,
+        github_handle, gitlab_handle, linkedin_handle, twitter_handle,
+        cleared, verified, open_for_employment, mark_as_company_on_leaderboards,
+        resolved_report_count, thanks_items_total_count,
+        badges_json, public_reviews_json
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_UPSERT_FINALLY_SQL: Final[str] = _INSERT_FINALLY_SQL + '''
+    ON CONFLICT(username) DO UPDATE SET
+        name = excluded.name,
+        intro = excluded.intro,
+        profileActivated = excluded.profileActivated,
+        profile_created_at = excluded.profile_created_at,
+        location = excluded.location,
+        website = excluded.website,
+        bio = excluded.bio,
+        bugcrowd_handle = excluded.bugcrowd_handle,
+        hack_the_box_handle = excluded.hack_the_box_handle,
+        github_handle = excluded.github_handle,
+        gitlab_handle = excluded.gitlab_handle,
+        linkedin_handle = excluded.linkedin_handle,
+        twitter_handle = excluded.twitter_handle,
+        cleared = excluded.cleared,
+        verified = excluded.verified,
+        open_for_employment = excluded.open_for_employment,
+        mark_as_company_on_leaderboards = excluded.mark_as_company_on_leaderboards,
+        resolved_report_count = excluded.resolved_report_count,
+        thanks_items_total_count = excluded.thanks_items_total_count,
+        badges_json = excluded.badges_json,
+        public_reviews_json = excluded.public_reviews_json
+'''
+
+_UPDATE_FINALLY_SQL: Final[str] = '''
+    UPDATE finally_table SET
+        name = ?,
+        intro = ?,
+        profileActivated = ?,
+        profile_created_at = ?,
+        location = ?,
+        website = ?,
+        bio = ?,
+        bugcrowd_handle = ?,
+        hack_the_box_handle = ?,
+        github_handle = ?,
+        gitlab_handle = ?,
+        linkedin_handle = ?,
+        twitter_handle = ?,
+        cleared = ?,
+        verified = ?,
+        open_for_employment = ?,
+        mark_as_company_on_leaderboards = ?,
+        resolved_report_count = ?,
+        thanks_items_total_count = ?,
+        badges_json = ?,
+        public_reviews_json = ?
+    WHERE username = ?
+'''
+
+# Поля, по которым разрешён поиск, и готовые запросы для них
+_SEARCH_LIKE_SQL_BY_FIELD: Final[Dict[str, str]] = {
+    field: f'SELECT * FROM finally_table WHERE {field} LIKE ?'
+    for field in ('username', 'name', 'location', 'github_handle')
+}
+
+_SEARCH_FTS_SQL: Final[str] = '''
+    SELECT f.* FROM finally_table f
+    JOIN finally_fts ON f.id = finally_fts.rowid
+    WHERE finally_fts MATCH ?
+'''
+
+_STATISTICS_SQL: Final[str] = '''
+    SELECT
+        (SELECT COUNT(*) FROM primary_table),
+        (SELECT COUNT(*) FROM finally_table),
+        (SELECT COUNT(DISTINCT source) FROM primary_table),
+        (SELECT MAX(created_at) FROM primary_table),
+        (SELECT MAX(created_at) FROM finally_table)
+'''
+
+_FINALLY_STATISTICS_SQL: Final[str] = '''
+    SELECT
+        (SELECT COUNT(*) FROM finally_table),
+        (SELECT COUNT(*) FROM finally_table WHERE verified = 1),
+        (SELECT COUNT(*) FROM finally_table WHERE resolved_report_count > 0),
+        (SELECT AVG(resolved_report_count) FROM finally_table)
+'''
 
 class DatabaseManager:
     def __init__(self, db_path: str = 'database.db'):
         self.db_path = db_path
+        self.connection: Optional[aiosqlite.Connection] = None
+        self._initialized = False
+        self._fts_enabled = False
+        self._finally_unique = False
+    
+    @property
+    def finally_unique(self) -> bool:
+        """Есть ли уникальный индекс по username в finally_table (нужен для upsert_finally_records)"""
+        return self._finally_unique
     
     async def __aenter__(self):
         self.connection = await aiosqlite.connect(self.db_path)
         await self.connection.execute('PRAGMA foreign_keys = ON')
+        await self._configure_pragmas()
         await self.initialize()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.connection.close()
+        self.connection = None
+    
+    async def _configure_pragmas(self):
+        """Настройка SQLite под интенсивную запись.
+
+        WAL убирает fsync на каждый commit, но работает только для файла БД
+        на локальном диске (не на сетевых ФС).
+        """
+        try:
+            async with self.connection.execute('PRAGMA journal_mode = WAL') as cursor:
+                journal_mode = (await cursor.fetchone())[0]
+            if journal_mode.lower() == 'wal':
+                await self.connection.execute('PRAGMA synchronous = NORMAL')
+            else:
+                logger.warning(f'WAL недоступен, используется журнал: {journal_mode}')
+        except Exception as e:
+            logger.warning(f'WAL недоступен, используется журнал по умолчанию: {e}')
+        await self.connection.execute('PRAGMA temp_store = MEMORY')
+        await self.connection.execute('PRAGMA cache_size = -65536')
+        await self.connection.execute('PRAGMA mmap_size = 268435456')
     
     async def initialize(self):
         """Инициализация базы данных и создание таблиц"""
+        if self._initialized:
+            return
+        
         await self.connection.execute('''
             CREATE TABLE IF NOT EXISTS primary_table (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -162,7 +164,7 @@ class DatabaseManager:
         await self.connection.execute('''
             CREATE TABLE IF NOT EXISTS finally_table (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT NOT NULL,
+                username TEXT NOT NULL UNIQUE,
                 name TEXT,
                 intro TEXT,
                 profileActivated BOOLEAN,
@@ -188,18 +190,108 @@ class DatabaseManager:
             )
         ''')
         
+        await self.connection.execute(
+            'CREATE INDEX IF NOT EXISTS idx_primary_username ON primary_table(username)'
+        )
+        await self.connection.execute(
+            'CREATE INDEX IF NOT EXISTS idx_primary_created ON primary_table(created_at DESC)'
+        )
+        self._finally_unique = await self._ensure_finally_username_unique()
+        await self._ensure_finally_fts()
+        
         await self.connection.commit()
+        self._initialized = True
         logger.info('Таблицы созданы или уже существуют.')
     
+    async def _ensure_finally_username_unique(self) -> bool:
+        """Уникальность username в finally_table для таблиц, созданных без UNIQUE"""
+        try:
+            await self.connection.execute(_CREATE_FINALLY_USERNAME_INDEX_SQL)
+            return True
+        except aiosqlite.IntegrityError:
+            async with self.connection.execute(
+                'SELECT COUNT(*) - COUNT(DISTINCT username) FROM finally_table'
+            ) as cursor:
+                duplicates = (await cursor.fetchone())[0]
+            logger.error(
+                f'В finally_table есть дубли username ({duplicates} лишних записей), '
+                'пакетное обновление недоступно. Запустите миграцию: python migrate.py'
+            )
+            return False
+    
+    async def deduplicate_finally_records(self) -> int:
+        """Миграция: удаляет дубли username в finally_table, оставляя самую свежую запись"""
+        try:
+            async with self.connection.execute('''
+                DELETE FROM finally_table
+                WHERE id NOT IN (SELECT MAX(id) FROM finally_table GROUP BY username)
+            ''') as cursor:
+                deleted = cursor.rowcount
+            await self.connection.execute(_CREATE_FINALLY_USERNAME_INDEX_SQL)
+            await self.connection.commit()
+            self._finally_unique = True
+            logger.info(f'Удалено дублей из finally_table: {deleted}')
+            return deleted
+        except Exception as e:
+            await self.connection.rollback()
+            logger.error(f'Ошибка при удалении дублей: {e}')
+            raise
+    
+    async def _ensure_finally_fts(self):
+        """Полнотекстовый индекс finally_fts поверх finally_table с триггерами синхронизации.
+
+        Токенизатор trigram сохраняет поиск по подстроке, как у прежнего LIKE '%q%'.
+        Если SQLite собран без FTS5, поиск остаётся на LIKE.
+        """
+        async with self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'finally_fts'"
+        ) as cursor:
+            exists = await cursor.fetchone() is not None
+        
+        try:
+            await self.connection.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS finally_fts USING fts5(
+                    username, name, location, github_handle, bio,
+                    content='finally_table', content_rowid='id', tokenize='trigram'
+                )
+            ''')
+        except aiosqlite.OperationalError as e:
+            logger.warning(f'FTS5 недоступен, поиск будет через LIKE: {e}')
+            return
+        
+        await self.connection.execute('''
+            CREATE TRIGGER IF NOT EXISTS finally_fts_ai AFTER INSERT ON finally_table BEGIN
+                INSERT INTO finally_fts(rowid, username, name, location, github_handle, bio)
+                VALUES (new.id, new.username, new.name, new.location, new.github_handle, new.bio);
+            END
+        ''')
+        await self.connection.execute('''
+            CREATE TRIGGER IF NOT EXISTS finally_fts_ad AFTER DELETE ON finally_table BEGIN
+                INSERT INTO finally_fts(finally_fts, rowid, username, name, location, github_handle, bio)
+                VALUES ('delete', old.id, old.username, old.name, old.location, old.github_handle, old.bio);
+            END
+        ''')
+        await self.connection.execute('''
+            CREATE TRIGGER IF NOT EXISTS finally_fts_au AFTER UPDATE ON finally_table BEGIN
+                INSERT INTO finally_fts(finally_fts, rowid, username, name, location, github_handle, bio)
+                VALUES ('delete', old.id, old.username, old.name, old.location, old.github_handle, old.bio);
+                INSERT INTO finally_fts(rowid, username, name, location, github_handle, bio)
+                VALUES (new.id, new.username, new.name, new.location, new.github_handle, new.bio);
+            END
+        ''')
+        
+        if not exists:
+            # Индексируем записи, появившиеся до создания finally_fts
+            await self.connection.execute("INSERT INTO finally_fts(finally_fts) VALUES ('rebuild')")
+        self._fts_enabled = True
+    
     async def add_primary_record(self, data: PrimaryData) -> int:
         """Добавление записи в primary_table"""
         try:
-            print(data.source)
             async with self.connection.cursor() as cursor:
                 await cursor.execute(
-                    '''INSERT INTO primary_table (username, source, json_info) 
-                       VALUES (?, ?, ?)''',
-                    (data.username, data.source, json.dumps(data.json_info, ensure_ascii=False))
+                    _INSERT_PRIMARY_SQL,
+                    (data.username, data.source, json_dumps(data.json_info))
                 )
                 await self.connection.commit()
                 record_id = cursor.lastrowid
@@ -212,6 +304,28 @@ class DatabaseManager:
             logger.error(f'Ошибка при добавлении записи: {e}')
             raise
     
+    async def add_primary_records(self, rows: List[PrimaryData]) -> int:
+        """Пакетное добавление записей в primary_table одной транзакцией"""
+        if not rows:
+            return 0
+        params = [
+            (r.username, r.source, json_dumps(r.json_info))
+            for r in rows
+        ]
+        try:
+            await self.connection.executemany(_INSERT_PRIMARY_SQL, params)
+            await self.connection.commit()
+            logger.info(f'Добавлено записей в primary_table: {len(params)}')
+            return len(params)
+        except aiosqlite.IntegrityError as e:
+            await self.connection.rollback()
+            logger.error(f'Ошибка целостности данных: {e}')
+            raise
+        except Exception as e:
+            await self.connection.rollback()
+            logger.error(f'Ошибка при пакетном добавлении записей: {e}')
+            raise
+    
     async def get_primary_by_id(self, record_id: int) -> Optional[PrimaryData]:
         """Получение записи из primary_table по ID"""
         try:
@@ -221,13 +335,7 @@ class DatabaseManager:
             ) as cursor:
                 row = await cursor.fetchone()
                 if row:
-                    return PrimaryData(
-                        id=row[0],
-                        username=row[1],
-                        source=row[2],
-                        json_info=json.loads(row[3]),
-                        created_at=row[4]
-                    )
+                    return PrimaryData.from_db_row(row)
                 return None
         except Exception as e:
             logger.error(f'Ошибка при получении записи: {e}')
@@ -242,13 +350,7 @@ class DatabaseManager:
             ) as cursor:
                 row = await cursor.fetchone()
                 if row:
-                    return PrimaryData(
-                        id=row[0],
-                        username=row[1],
-                        source=row[2],
-                        json_info=json.loads(row[3]),
-                        created_at=row[4]
-                    )
+                    return PrimaryData.from_db_row(row)
                 return None
         except Exception as e:
             logger.error(f'Ошибка при получении записи: {e}')
@@ -258,30 +360,34 @@ class DatabaseManager:
         """Получение всех записей из primary_table"""
         try:
             async with self.connection.execute(
-                f'SELECT * FROM primary_table ORDER BY created_at DESC LIMIT {limit}'
+                'SELECT * FROM primary_table ORDER BY created_at DESC LIMIT ?',
+                (limit,)
             ) as cursor:
                 rows = await cursor.fetchall()
-                return [
-                    PrimaryData(
-                        id=row[0],
-                        username=row[1],
-                        source=row[2],
-                        json_info=json.loads(row[3]),
-                        created_at=row[4]
-                    ) for row in rows
-                ]
+                return [PrimaryData.from_db_row(row) for row in rows]
         except Exception as e:
             logger.error(f'Ошибка при получении записей: {e}')
             return []
     
+    async def iter_all_primary_records(self, limit: Optional[int] = None) -> AsyncIterator[PrimaryData]:
+        """Потоковое чтение записей из primary_table без загрузки всей выборки в память"""
+        try:
+            async with self.connection.execute(
+                'SELECT * FROM primary_table ORDER BY created_at DESC LIMIT ?',
+                (-1 if limit is None else limit,)
+            ) as cursor:
+                async for row in cursor:
+                    yield PrimaryData.from_db_row(row)
+        except Exception as e:
+            logger.error(f'Ошибка при получении записей: {e}')
+    
     async def update_primary_record(self, record_id: int, data: PrimaryData) -> bool:
         """Обновление записи в primary_table"""
         try:
-            async with self.connection.cursor() as cursor:
-                await cursor.execute(
-                    'UPDATE primary_table SET username = ?, source = ?, json_info = ? WHERE id = ?',
-                    (data.username, data.source, json.dumps(data.json_info, ensure_ascii=False), record_id)
-                )
+            async with self.connection.execute(
+                'UPDATE primary_table SET username = ?, source = ?, json_info = ? WHERE id = ?',
+                (data.username, data.source, json_dumps(data.json_info), record_id)
+            ) as cursor:
                 await self.connection.commit()
                 updated = cursor.rowcount > 0
                 if updated:
@@ -294,8 +400,7 @@ class DatabaseManager:
     async def delete_primary_record(self, record_id: int) -> bool:
         """Удаление записи из primary_table"""
         try:
-            async with self.connection.cursor() as cursor:
-                await cursor.execute('DELETE FROM primary_table WHERE id = ?', (record_id,))
+            async with self.connection.execute('DELETE FROM primary_table WHERE id = ?', (record_id,)) as cursor:
                 await self.connection.commit()
                 deleted = cursor.rowcount > 0
                 if deleted:
@@ -312,41 +417,8 @@ class DatabaseManager:
                 logger.warning('Данные профиля в ответе не найдены.')
                 return None
 
-            db_data = data.to_db_dict()
             async with self.connection.cursor() as cursor:
-                await cursor.execute('''
-                    INSERT INTO finally_table (
-                        username, name, intro, profileActivated, profile_created_at,
-                        location, website, bio, bugcrowd_handle, hack_the_box_handle,
-                        github_handle, gitlab_handle, linkedin_handle, twitter_handle,
-                        cleared, verified, open_for_employment, mark_as_company_on_leaderboards,
-                        resolved_report_count, thanks_items_total_count,
-                        badges_json, public_reviews_json
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    db_data['username'],
-                    db_data['name'],
-                    db_data['intro'],
-                    db_data['profileActivated'],
-                    self._parse_timestamp(db_data['profile_created_at']),
-                    db_data['location'],
-                    db_data['website'],
-                    db_data['bio'],
-                    db_data['bugcrowd_handle'],
-                    db_data['hack_the_box_handle'],
-                    db_data['github_handle'],
-                    db_data['gitlab_handle'],
-                    db_data['linkedin_handle'],
-                    db_data['twitter_handle'],
-                    db_data['cleared'],
-                    db_data['verified'],
-                    db_data['open_for_employment'],
-                    db_data['mark_as_company_on_leaderboards'],
-                    db_data['resolved_report_count'],
-                    db_data['thanks_items_total_count'],
-                    db_data['badges_json'],
-                    db_data['public_reviews_json']
-                ))
+                await cursor.execute(_INSERT_FINALLY_SQL, data.to_db_tuple())
                 await self.connection.commit()
                 record_id = cursor.lastrowid
                 logger.info(f'Добавлена запись в finally_table с ID: {record_id}')
@@ -358,44 +430,83 @@ class DatabaseManager:
             logger.error(f'Ошибка при добавлении записи: {e}')
             raise
     
-    async def get_finally_by_id(self, record_id: int) -> Optional[FinallyData]:
+    async def upsert_finally_records(self, rows: List[Optional[FinallyData]]) -> int:
+        """Пакетное добавление или обновление записей в finally_table по username"""
+        if not self._finally_unique:
+            raise RuntimeError('В finally_table есть дубли username, запустите миграцию: python migrate.py')
+        params = [r.to_db_tuple() for r in rows if r is not None]
+        if not params:
+            return 0
+        try:
+            await self.connection.executemany(_UPSERT_FINALLY_SQL, params)
+            await self.connection.commit()
+            logger.info(f'Добавлено или обновлено записей в finally_table: {len(params)}')
+            return len(params)
+        except Exception as e:
+            await self.connection.rollback()
+            logger.error(f'Ошибка при пакетном добавлении/обновлении записей: {e}')
+            raise
+    
+    async def get_finally_by_id(self, record_id: int,
+                                columns: Sequence[str] = FINALLY_COLUMNS) -> Optional[FinallyData]:
         """Получение записи из finally_table по ID"""
         try:
+            select, projected = self._finally_projection(columns)
             async with self.connection.execute(
-                'SELECT * FROM finally_table WHERE id = ?',
+                f'SELECT {select} FROM finally_table WHERE id = ?',
                 (record_id,)
             ) as cursor:
                 row = await cursor.fetchone()
                 if row:
-                    return FinallyData.from_db_row(row)
+                    return FinallyData.from_db_row(row, projected)
                 return None
         except Exception as e:
             logger.error(f'Ошибка при получении записи: {e}')
             return None
     
-    async def get_finally_by_username(self, username: str) -> Optional[FinallyData]:
+    async def get_finally_by_username(self, username: str,
+                                      columns: Sequence[str] = FINALLY_COLUMNS) -> Optional[FinallyData]:
         """Получение записи из finally_table по имени пользователя"""
+        try:
+            select, projected = self._finally_projection(columns)
+            async with self.connection.execute(
+                f'SELECT {select} FROM finally_table WHERE username = ?',
+                (username,)
+            ) as cursor:
+                row = await cursor.fetchone()
+                if row:
+                    return FinallyData.from_db_row(row, projected)
+                return None
+        except Exception as e:
+            logger.error(f'Ошибка при получении записи: {e}')
+            return None
+    
+    async def get_finally_id_by_username(self, username: str) -> Optional[Tuple[int, str]]:
+        """Получение (id, created_at) записи из finally_table без чтения JSON колонок"""
         try:
             async with self.connection.execute(
-                'SELECT * FROM finally_table WHERE username = ?',
+                'SELECT id, created_at FROM finally_table WHERE username = ? LIMIT 1',
                 (username,)
             ) as cursor:
                 row = await cursor.fetchone()
                 if row:
-                    return FinallyData.from_db_row(row)
+                    return row[0], row[1]
                 return None
         except Exception as e:
             logger.error(f'Ошибка при получении записи: {e}')
             return None
     
-    async def get_all_finally_records(self, limit: int = 100) -> List[FinallyData]:
+    async def get_all_finally_records(self, limit: int = 100,
+                                      columns: Sequence[str] = FINALLY_COLUMNS) -> List[FinallyData]:
         """Получение всех записей из finally_table"""
         try:
+            select, projected = self._finally_projection(columns)
             async with self.connection.execute(
-                f'SELECT * FROM finally_table ORDER BY created_at DESC LIMIT {limit}'
+                f'SELECT {select} FROM finally_table ORDER BY created_at DESC LIMIT ?',
+                (limit,)
             ) as cursor:
                 rows = await cursor.fetchall()
-                return [FinallyData.from_db_row(row) for row in rows]
+                return [FinallyData.from_db_row(row, projected) for row in rows]
         except Exception as e:
             logger.error(f'Ошибка при получении записей: {e}')
             return []
@@ -403,14 +514,19 @@ class DatabaseManager:
     async def search_finally_records(self, search_query: str, field: str = 'username') -> List[FinallyData]:
         """Поиск записей в finally_table"""
         try:
-            valid_fields = ['username', 'name', 'location', 'github_handle']
-            if field not in valid_fields:
+            if field not in _SEARCH_LIKE_SQL_BY_FIELD:
                 field = 'username'
             
-            async with self.connection.execute(
-                f'SELECT * FROM finally_table WHERE {field} LIKE ?',
-                (f'%{search_query}%',)
-            ) as cursor:
+            # trigram находит только подстроки от 3 символов, короткие ищем через LIKE
+            if self._fts_enabled and len(search_query) >= 3:
+                phrase = search_query.replace('"', '""')
+                sql = _SEARCH_FTS_SQL
+                params = (f'{field} : "{phrase}"',)
+            else:
+                sql = _SEARCH_LIKE_SQL_BY_FIELD[field]
+                params = (f'%{search_query}%',)
+            
+            async with self.connection.execute(sql, params) as cursor:
                 rows = await cursor.fetchall()
                 return [FinallyData.from_db_row(row) for row in rows]
         except Exception as e:
@@ -420,57 +536,9 @@ class DatabaseManager:
     async def update_finally_record(self, username: str, data: FinallyData) -> bool:
         """Обновление записи в finally_table"""
         try:
-            db_data = data.to_db_dict()
+            params = data.to_db_tuple()[1:] + (username,)
             
-            async with self.connection.cursor() as cursor:
-                await cursor.execute('''
-                    UPDATE finally_table SET
-                        name = ?,
-                        intro = ?,
-                        profileActivated = ?,
-                        profile_created_at = ?,
-                        location = ?,
-                        website = ?,
-                        bio = ?,
-                        bugcrowd_handle = ?,
-                        hack_the_box_handle = ?,
-                        github_handle = ?,
-                        gitlab_handle = ?,
-                        linkedin_handle = ?,
-                        twitter_handle = ?,
-                        cleared = ?,
-                        verified = ?,
-                        open_for_employment = ?,
-                        mark_as_company_on_leaderboards = ?,
-                        resolved_report_count = ?,
-                        thanks_items_total_count = ?,
-                        badges_json = ?,
-                        public_reviews_json = ?
-                    WHERE username = ?
-                ''', (
-                    db_data['name'],
-                    db_data['intro'],
-                    db_data['profileActivated'],
-                    self._parse_timestamp(db_data['profile_created_at']),
-                    db_data['location'],
-                    db_data['website'],
-                    db_data['bio'],
-                    db_data['bugcrowd_handle'],
-                    db_data['hack_the_box_handle'],
-                    db_data['github_handle'],
-                    db_data['gitlab_handle'],
-                    db_data['linkedin_handle'],
-                    db_data['twitter_handle'],
-                    db_data['cleared'],
-                    db_data['verified'],
-                    db_data['open_for_employment'],
-                    db_data['mark_as_company_on_leaderboards'],
-                    db_data['resolved_report_count'],
-                    db_data['thanks_items_total_count'],
-                    db_data['badges_json'],
-                    db_data['public_reviews_json'],
-                    username
-                ))
+            async with self.connection.execute(_UPDATE_FINALLY_SQL, params) as cursor:
                 await self.connection.commit()
                 updated = cursor.rowcount > 0
                 if updated:
@@ -483,8 +551,7 @@ class DatabaseManager:
     async def delete_finally_record(self, username: str) -> bool:
         """Удаление записи из finally_table"""
         try:
-            async with self.connection.cursor() as cursor:
-                await cursor.execute('DELETE FROM finally_table WHERE username = ?', (username,))
+            async with self.connection.execute('DELETE FROM finally_table WHERE username = ?', (username,)) as cursor:
                 await self.connection.commit()
                 deleted = cursor.rowcount > 0
                 if deleted:
@@ -497,8 +564,7 @@ class DatabaseManager:
     async def delete_finally_by_id(self, record_id: int) -> bool:
         """Удаление записи из finally_table по ID"""
         try:
-            async with self.connection.cursor() as cursor:
-                await cursor.execute('DELETE FROM finally_table WHERE id = ?', (record_id,))
+            async with self.connection.execute('DELETE FROM finally_table WHERE id = ?', (record_id,)) as cursor:
                 await self.connection.commit()
                 deleted = cursor.rowcount > 0
                 if deleted:
@@ -515,14 +581,13 @@ class DatabaseManager:
             data = FinallyData.from_user_data(user_data)
             
             # Проверяем существование пользователя
-            existing = await self.get_finally_by_username(data.username)
+            existing = await self.get_finally_id_by_username(data.username)
             
             if existing:
-                # Обновляем существующую запись
-                data.id = existing.id  # Сохраняем существующий ID
-                data.created_at = existing.created_at  # Сохраняем время создания
+                # Обновляем существующую запись, сохраняя ID и время создания
+                data.id, data.created_at = existing
                 updated = await self.update_finally_record(data.username, data)
-                return existing.id if updated else 0
+                return data.id if updated else 0
             else:
                 # Добавляем новую запись
                 return await self.add_finally_record(data)
@@ -533,11 +598,10 @@ class DatabaseManager:
     async def clear_all_data(self):
         """Очистка всех данных из таблиц"""
         try:
-            async with self.connection.cursor() as cursor:
-                await cursor.execute('DELETE FROM finally_table')
-                await cursor.execute('DELETE FROM primary_table')
-                await self.connection.commit()
-                logger.info('Все данные очищены')
+            await self.connection.execute('DELETE FROM finally_table')
+            await self.connection.execute('DELETE FROM primary_table')
+            await self.connection.commit()
+            logger.info('Все данные очищены')
         except Exception as e:
             logger.error(f'Ошибка при очистке данных: {e}')
             raise
@@ -545,24 +609,15 @@ class DatabaseManager:
     async def get_statistics(self) -> Dict[str, Any]:
         """Получение статистики по базе данных"""
         try:
-            stats = {}
-            
-            async with self.connection.execute('SELECT COUNT(*) FROM primary_table') as cursor:
-                stats['primary_count'] = (await cursor.fetchone())[0]
-            
-            async with self.connection.execute('SELECT COUNT(*) FROM finally_table') as cursor:
-                stats['finally_count'] = (await cursor.fetchone())[0]
-            
-            async with self.connection.execute('SELECT COUNT(DISTINCT source) FROM primary_table') as cursor:
-                stats['unique_sources'] = (await cursor.fetchone())[0]
-            
-            async with self.connection.execute('SELECT MAX(created_at) FROM primary_table') as cursor:
-                stats['last_primary'] = (await cursor.fetchone())[0]
-            
-            async with self.connection.execute('SELECT MAX(created_at) FROM finally_table') as cursor:
-                stats['last_finally'] = (await cursor.fetchone())[0]
-            
-            return stats
+            async with self.connection.execute(_STATISTICS_SQL) as cursor:
+                row = await cursor.fetchone()
+            return {
+                'primary_count': row[0],
+                'finally_count': row[1],
+                'unique_sources': row[2],
+                'last_primary': row[3],
+                'last_finally': row[4]
+            }
         except Exception as e:
             logger.error(f'Ошибка при получении статистики: {e}')
             return {}
@@ -570,20 +625,14 @@ class DatabaseManager:
     async def get_finally_statistics(self) -> Dict[str, Any]:
         """Получение статистики по finally_table"""
         try:
-            stats = {}
-            
-            async with self.connection.execute('SELECT COUNT(*) FROM finally_table') as cursor:
-                stats['total_users'] = (await cursor.fetchone())[0]
-            
-            async with self.connection.execute('SELECT COUNT(*) FROM finally_table WHERE verified = 1') as cursor:
-                stats['verified_users'] = (await cursor.fetchone())[0]
-            
-            async with self.connection.execute('SELECT COUNT(*) FROM finally_table WHERE resolved_report_count > 0') as cursor:
-                stats['users_with_reports'] = (await cursor.fetchone())[0]
-            
-            async with self.connection.execute('SELECT AVG(resolved_report_count) FROM finally_table') as cursor:
-                result = await cursor.fetchone()
-                stats['avg_reports'] = round(result[0] or 0, 2)
+            async with self.connection.execute(_FINALLY_STATISTICS_SQL) as cursor:
+                row = await cursor.fetchone()
+            stats = {
+                'total_users': row[0],
+                'verified_users': row[1],
+                'users_with_reports': row[2],
+                'avg_reports': round(row[3] or 0, 2)
+            }
             
             async with self.connection.execute('''
                 SELECT username, resolved_report_count 
@@ -600,12 +649,16 @@ class DatabaseManager:
             logger.error(f'Ошибка при получении статистики: {e}')
             return {}
     
+    def _finally_projection(self, columns: Sequence[str]) -> Tuple[str, Optional[Tuple[str, ...]]]:
+        """Список колонок для SELECT и их порядок для FinallyData.from_db_row"""
+        columns = tuple(columns)
+        if columns == FINALLY_COLUMNS:
+            return '*', None
+        unknown = [c for c in columns if c not in FINALLY_COLUMNS]
+        if unknown:
+            raise ValueError(f'Неизвестные колонки finally_table: {unknown}')
+        return ', '.join(columns), columns
+    
     def _parse_timestamp(self, timestamp_str: Optional[str]) -> Optional[str]:
         """Парсинг timestamp строки в формат SQLite"""
-        if not timestamp_str:
-            return None
-        try:
-            dt = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-            return dt.strftime('%Y-%m-%d %H:%M:%S')
-        except Exception:
-            return None
+        return parse_timestamp(timestamp_str)
@@ -1,22 +1,37 @@
 import httpx
 from loguru import logger
 
-client = httpx.AsyncClient()
+from models import json_loads
+
+MAX_CONNECTIONS = 32
+
+client = httpx.AsyncClient(
+    http2=True,
+    timeout=30,
+    limits=httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_CONNECTIONS,
+        keepalive_expiry=60
+    ),
+)
+
+async def close_client():
+    '''Закрывает общий клиент и его пул соединений.'''
+    await client.aclose()
 
 async def graphql_post_request(query_data: dict) -> (dict | None):
     try:
         logger.info('Запрос к graphql.')
         response = await client.post(
                 "https://hackerone.com/graphql",
-                json=query_data,
-                timeout=30
+                json=query_data
                 # TODO здесь прокси можно добавить
             )
         if response.status_code == 200:
             logger.success('Успешно. 200')
-            return response.json()
+            return json_loads(response.content)
         else:
-            logger.error(response.json)
+            logger.error(response.text)
             return None
     except Exception as e:
         logger.error(e)
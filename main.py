@@ -2,46 +2,67 @@ import asyncio
 
 from loguru import logger
 
-from graphql_requests import graphql_post_request
+from graphql_requests import graphql_post_request, close_client, MAX_CONNECTIONS
 from query_builder import QueryBuilder
 from data_manager import DataManager
 from db import DatabaseManager
 
-async def hacktivity_search(size: int, offset: int):
+async def hacktivity_search(db: DatabaseManager, size: int, offset: int):
     query = await QueryBuilder.build_hacktivity_search_query(size=size, offset=offset)
     response = await graphql_post_request(query)
 
     nodes = response['data']['search']['nodes']
-    processed_data = await DataManager.process_nodes(nodes)
-
-    async with DatabaseManager('data.db') as db:
-        for obj in processed_data:
-            await db.add_primary_record(obj)
-
-async def profile_info_search():
-    async with DatabaseManager('data.db') as db:
-        primary_data = await db.get_all_primary_records()
-        for hunter in primary_data:
-            username = hunter.username
-        
-            query = await QueryBuilder.build_profile_info_query(username)
-            response = await graphql_post_request(query)
-            user_data = response['data']['user']
-
-            processed_data = await DataManager.process_profile(user_data)
-            await db.add_finally_record(processed_data)
-
-async def primary_search():
-    await hacktivity_search(100, 0)
+    processed_data = DataManager.process_nodes(nodes)
+
+    await db.add_primary_records(processed_data)
+
+async def fetch_profile(username: str, sem: asyncio.Semaphore) -> (dict | None):
+    async with sem:
+        query = await QueryBuilder.build_profile_info_query(username)
+        return await graphql_post_request(query)
+
+def check_finally_unique(db: DatabaseManager):
+    if not db.finally_unique:
+        raise RuntimeError(
+            'В finally_table есть дубли username, запустите миграцию: python migrate.py. '
+            'Данные не запрашивались.'
+        )
+
+async def profile_info_search(db: DatabaseManager):
+    check_finally_unique(db)
+    # Один хантер встречается в primary_table многократно, профиль запрашиваем один раз
+    usernames = {hunter.username async for hunter in db.iter_all_primary_records(limit=100)}
+
+    sem = asyncio.Semaphore(MAX_CONNECTIONS)
+    responses = await asyncio.gather(*(fetch_profile(username, sem) for username in usernames))
+
+    processed_data = []
+    for response in responses:
+        if response is None:
+            continue
+        # Ответ с errors или data: null отбрасывается в process_profile
+        user_data = (response.get('data') or {}).get('user')
+        processed_data.append(await DataManager.process_profile(user_data))
+
+    await db.upsert_finally_records(processed_data)
+
+async def primary_search(db: DatabaseManager):
+    await hacktivity_search(db, 100, 0)
     logger.success('Первичные данные получены.')
 
-async def finally_search():
-    await profile_info_search()
+async def finally_search(db: DatabaseManager):
+    await profile_info_search(db)
     logger.success('Итоговые данные получены.')
 
 async def main():
-    await primary_search()
-    await finally_search()
+    try:
+        async with DatabaseManager('data.db') as db:
+            # Проверяем до сбора данных, чтобы не потерять результаты обхода
+            check_finally_unique(db)
+            await primary_search(db)
+            await finally_search(db)
+    finally:
+        await close_client()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,13 @@
+import asyncio
+
+from loguru import logger
+
+from db import DatabaseManager
+
+async def main():
+    async with DatabaseManager('data.db') as db:
+        deleted = await db.deduplicate_finally_records()
+        logger.success(f'Миграция завершена, удалено записей: {deleted}.')
+
+if __name__ == "__main__":
+    asyncio.run(main())
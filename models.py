@@ -0,0 +1,260 @@
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from dataclasses import dataclass, field
+
+try:
+    import orjson
+except ImportError:  # orjson не установлен, используем стандартный json
+    orjson = None  # type: ignore[assignment]
+
+def json_dumps(obj: Any) -> str:
+    """Сериализация в JSON строку для TEXT колонок"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, ensure_ascii=False)
+
+def json_loads(data: Union[str, bytes]) -> Any:
+    """Разбор JSON из TEXT колонки или тела HTTP ответа"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def parse_timestamp(timestamp_str: Optional[str]) -> Optional[str]:
+    """Парсинг timestamp строки в формат SQLite"""
+    if not timestamp_str:
+        return None
+    try:
+        dt = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
+        return dt.strftime('%Y-%m-%d %H:%M:%S')
+    except Exception:
+        return None
+
+@dataclass(slots=True)
+class PrimaryData:
+    """Датакласс для primary_table"""
+    id: Optional[int] = None
+    username: str = ""
+    source: str = ""
+    json_info: Dict[str, Any] = field(default_factory=dict)
+    created_at: Optional[str] = None
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PrimaryData':
+        """Создание объекта из словаря"""
+        return cls(
+            id=data.get('id'),
+            username=data.get('username', ''),
+            source=data.get('source', ''),
+            json_info=data.get('json_info', {}),
+            created_at=data.get('created_at')
+        )
+    
+    @classmethod
+    def from_db_row(cls, row: Tuple[Any, ...]) -> 'PrimaryData':
+        """Создание объекта из строки primary_table"""
+        return cls(row[0], row[1], row[2], json_loads(row[3]), row[4])
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Преобразование в словарь"""
+        return {
+            'id': self.id,
+            'username': self.username,
+            'source': self.source,
+            'json_info': self.json_info,
+            'created_at': self.created_at
+        }
+
+# Поля из ответа API, копируемые в FinallyData как есть, и их значения по умолчанию
+_FINALLY_FIELDS: Tuple[Tuple[str, Any], ...] = (
+    ('username', ''),
+    ('name', None),
+    ('intro', None),
+    ('profileActivated', False),
+    ('location', None),
+    ('website', None),
+    ('bio', None),
+    ('bugcrowd_handle', None),
+    ('hack_the_box_handle', None),
+    ('github_handle', None),
+    ('gitlab_handle', None),
+    ('linkedin_handle', None),
+    ('twitter_handle', None),
+    ('cleared', False),
+    ('verified', False),
+    ('open_for_employment', None),
+    ('mark_as_company_on_leaderboards', False),
+    ('resolved_report_count', 0),
+    ('thanks_items_total_count', 0),
+)
+
+# Колонки finally_table в порядке полей FinallyData
+FINALLY_COLUMNS: Tuple[str, ...] = (
+    'id', 'username', 'name', 'intro', 'profileActivated', 'profile_created_at',
+    'location', 'website', 'bio', 'bugcrowd_handle', 'hack_the_box_handle',
+    'github_handle', 'gitlab_handle', 'linkedin_handle', 'twitter_handle',
+    'cleared', 'verified', 'open_for_employment', 'mark_as_company_on_leaderboards',
+    'resolved_report_count', 'thanks_items_total_count',
+    'badges_json', 'public_reviews_json', 'created_at',
+)
+
+_BOOL_COLUMNS: Tuple[str, ...] = (
+    'profileActivated', 'cleared', 'verified', 'open_for_employment', 'mark_as_company_on_leaderboards',
+)
+
+_JSON_COLUMNS: Tuple[str, ...] = ('badges_json', 'public_reviews_json')
+
+@dataclass(slots=True)
+class FinallyData:
+    """Датакласс для finally_table"""
+    id: Optional[int] = None
+    username: str = ""
+    name: Optional[str] = None
+    intro: Optional[str] = None
+    profileActivated: bool = False
+    profile_created_at: Optional[str] = None
+    location: Optional[str] = None
+    website: Optional[str] = None
+    bio: Optional[str] = None
+    bugcrowd_handle: Optional[str] = None
+    hack_the_box_handle: Optional[str] = None
+    github_handle: Optional[str] = None
+    gitlab_handle: Optional[str] = None
+    linkedin_handle: Optional[str] = None
+    twitter_handle: Optional[str] = None
+    cleared: bool = False
+    verified: bool = False
+    open_for_employment: Optional[bool] = None
+    mark_as_company_on_leaderboards: bool = False
+    resolved_report_count: int = 0
+    thanks_items_total_count: int = 0
+    badges_json: List[Dict[str, Any]] = field(default_factory=list)
+    public_reviews_json: List[Dict[str, Any]] = field(default_factory=list)
+    created_at: Optional[str] = None
+    
+    @classmethod
+    def from_user_data(cls, user_data: Dict[str, Any]) -> 'FinallyData':
+        """Создание объекта из сырых данных пользователя"""
+        g = user_data.get
+        # null из API заменяется значением по умолчанию, как и отсутствующий ключ
+        kwargs: Dict[str, Any] = {k: v if (v := g(k)) is not None else d for k, d in _FINALLY_FIELDS}
+        kwargs['profile_created_at'] = g('created_at')
+
+        badges = g('badges')
+        kwargs['badges_json'] = badges.get('edges', []) if isinstance(badges, dict) else []
+
+        public_reviews = g('public_reviews')
+        kwargs['public_reviews_json'] = public_reviews.get('edges', []) if isinstance(public_reviews, dict) else []
+
+        return cls(**kwargs)
+    
+    @classmethod
+    def from_db_row(cls, row: Tuple[Any, ...], columns: Optional[Sequence[str]] = None) -> 'FinallyData':
+        """Создание объекта из строки finally_table.
+
+        Без columns строка содержит все колонки в порядке полей. Для выборки
+        части колонок columns задаёт их порядок, остальные поля получают
+        значения по умолчанию.
+        """
+        if columns is not None:
+            # NULL колонки не передаём, поля получают значения по умолчанию
+            values: Dict[str, Any] = {c: v for c, v in zip(columns, row) if v is not None}
+            for name in _BOOL_COLUMNS:
+                if name in values:
+                    values[name] = bool(values[name])
+            for name in _JSON_COLUMNS:
+                if name in values:
+                    values[name] = json_loads(values[name])
+            return cls(**values)
+        
+        # SQLite хранит BOOLEAN как 0/1, возвращаем полям тип bool
+        return cls(
+            row[0], row[1], row[2], row[3], bool(row[4]), row[5], row[6], row[7],
+            row[8], row[9], row[10], row[11], row[12], row[13], row[14],
+            bool(row[15]), bool(row[16]), None if row[17] is None else bool(row[17]),
+            bool(row[18]), row[19] or 0, row[20] or 0,
+            json_loads(row[21]), json_loads(row[22]), row[23]
+        )
+    
+    def to_db_dict(self) -> Dict[str, Any]:
+        """Преобразование в словарь для вставки в БД"""
+        return {
+            'username': self.username,
+            'name': self.name,
+            'intro': self.intro,
+            'profileActivated': self.profileActivated,
+            'profile_created_at': self.profile_created_at,
+            'location': self.location,
+            'website': self.website,
+            'bio': self.bio,
+            'bugcrowd_handle': self.bugcrowd_handle,
+            'hack_the_box_handle': self.hack_the_box_handle,
+            'github_handle': self.github_handle,
+            'gitlab_handle': self.gitlab_handle,
+            'linkedin_handle': self.linkedin_handle,
+            'twitter_handle': self.twitter_handle,
+            'cleared': self.cleared,
+            'verified': self.verified,
+            'open_for_employment': self.open_for_employment,
+            'mark_as_company_on_leaderboards': self.mark_as_company_on_leaderboards,
+            'resolved_report_count': self.resolved_report_count,
+            'thanks_items_total_count': self.thanks_items_total_count,
+            'badges_json': json_dumps(self.badges_json),  # JSON строка
+            'public_reviews_json': json_dumps(self.public_reviews_json)  # JSON строка
+        }
+    
+    def to_db_tuple(self) -> Tuple[Any, ...]:
+        """Параметры INSERT для finally_table в порядке колонок"""
+        return (
+            self.username,
+            self.name,
+            self.intro,
+            self.profileActivated,
+            parse_timestamp(self.profile_created_at),
+            self.location,
+            self.website,
+            self.bio,
+            self.bugcrowd_handle,
+            self.hack_the_box_handle,
+            self.github_handle,
+            self.gitlab_handle,
+            self.linkedin_handle,
+            self.twitter_handle,
+            self.cleared,
+            self.verified,
+            self.open_for_employment,
+            self.mark_as_company_on_leaderboards,
+            self.resolved_report_count,
+            self.thanks_items_total_count,
+            json_dumps(self.badges_json),
+            json_dumps(self.public_reviews_json)
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Преобразование в обычный словарь"""
+        return {
+            'id': self.id,
+            'username': self.username,
+            'name': self.name,
+            'intro': self.intro,
+            'profileActivated': self.profileActivated,
+            'profile_created_at': self.profile_created_at,
+            'location': self.location,
+            'website': self.website,
+            'bio': self.bio,
+            'bugcrowd_handle': self.bugcrowd_handle,
+            'hack_the_box_handle': self.hack_the_box_handle,
+            'github_handle': self.github_handle,
+            'gitlab_handle': self.gitlab_handle,
+            'linkedin_handle': self.linkedin_handle,
+            'twitter_handle': self.twitter_handle,
+            'cleared': self.cleared,
+            'verified': self.verified,
+            'open_for_employment': self.open_for_employment,
+            'mark_as_company_on_leaderboards': self.mark_as_company_on_leaderboards,
+            'resolved_report_count': self.resolved_report_count,
+            'thanks_items_total_count': self.thanks_items_total_count,
+            'badges_json': self.badges_json,
+            'public_reviews_json': self.public_reviews_json,
+            'created_at': self.created_at
+        }